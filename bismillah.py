@@ -42,12 +42,13 @@ worksheet = connect_gsheet()
 #               LOAD / RELOAD DATA
 # ────────────────────────────────────────────────
 def load_data() -> pd.DataFrame:
-    rec = worksheet.get_all_records()
-    if not rec:
+    data = worksheet.get_all_values()
+    if not data:
         return pd.DataFrame()
-    df = pd.DataFrame(rec)
-    df["TL"]   = pd.to_datetime(df["TL"],  dayfirst=True, errors="coerce")
-    df["USIA"] = pd.to_numeric(df["USIA"], errors="coerce")
+    df = pd.DataFrame(data[1:], columns=data[0])
+    if not df.empty:
+        df = df.drop(columns=["No"], errors="ignore")
+        df["USIA"] = pd.to_numeric(df["USIA"], errors="coerce").fillna(0).astype(int)
     return df
 
 def reload_data():
@@ -56,7 +57,10 @@ def reload_data():
 if "df" not in st.session_state:
     reload_data()
 
-get_df = lambda: st.session_state.df   # helper cepat
+# Data hanya ditarik dari Google Sheets saat sesi dimulai, setelah CRUD,
+# atau saat tombol Refresh ditekan – interaksi UI cukup memakai salinan ini.
+def get_df() -> pd.DataFrame:
+    return st.session_state.df.copy()
 
 # ------------------ CLUSTERING TOOLS  --------------
 
@@ -163,14 +167,6 @@ if not st.session_state.logged:
 # # ⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻
 #     FUNGSI CRUD UNTUK GOOGLE SHEETS  
 # ⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻⸻
-def get_df():
-    data = worksheet.get_all_values()
-    df = pd.DataFrame(data[1:], columns=data[0])
-    if not df.empty:
-        df = df.drop(columns=["No"], errors="ignore")  # 👉 Tambahkan baris ini
-        df["USIA"] = pd.to_numeric(df["USIA"], errors="coerce").fillna(0).astype(int)
-    return df
-
 def add_row(rec):
     # Urutan sesuai header kecuali "No"
     kolom_urutan = ["ID PEGAWAI", "NAMA", "GDP", "GELAR BELAKANG", "JABATAN", "JK",
@@ -178,6 +174,7 @@ def add_row(rec):
                     "PENDIDIKAN AKHIR", "USIA", "OPD", "KOMPETENSI"]
     values = [[rec.get(k, "") for k in kolom_urutan]]
     worksheet.append_rows(values, value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
+    reload_data()
     return True
 
 def update_row(id_pegawai, row):
@@ -185,6 +182,7 @@ def update_row(id_pegawai, row):
     for idx, r in enumerate(sheet_data[1:], start=2):  # data[0] = header, start dari row 2
         if r[0] == id_pegawai:  # Pastikan ID PEGAWAI ada di kolom A (indeks 0)
             worksheet.update(f"A{idx}:N{idx}", [row])  # update 14 kolom (A-N), kolom "No" tetap diabaikan
+            reload_data()
             return True
     return False
 
@@ -193,6 +191,7 @@ def delete_row(id_pegawai):
     for idx, r in enumerate(sheet_data[1:], start=2):
         if r[0] == id_pegawai:
             worksheet.delete_rows(idx)
+            reload_data()
             return True
     return False
 
@@ -319,125 +318,131 @@ elif page == "Data Pegawai":
     df = get_df()
     st.subheader("👥 Manajemen Data Pegawai")
 
-    aksi = st.radio("Pilih Aksi", ["Tambah Data", "Hapus Data", "Edit Data"], horizontal=True)
-
-    # Tambah Data
-    if aksi == "Tambah Data":
-        with st.form("add", clear_on_submit=True):
-            c1, c2 = st.columns(2)
-            with c1:
-                idp = st.text_input("ID Pegawai")
-                nama = st.text_input("Nama")
-                gdp = st.text_input("GDP")
-                gel = st.text_input("Gelar Belakang")
-                jab = st.text_input("Jabatan")
-                jk = st.selectbox("Jenis Kelamin", ["LAKI-LAKI", "PEREMPUAN"])
-            with c2:
-                tmp = st.text_input("Tempat Lahir")
-                ttl = st.date_input("Tanggal Lahir", datetime.today(), min_value=datetime(1900, 1, 1))
-                kod = st.text_input("Kode OPD")
-                paw = st.text_input("Pendidikan Awal")
-                pak = st.text_input("Pendidikan Akhir")
-                usia = st.number_input("Usia", min_value=0, step=1)
-                kmp = st.text_input("Kompetensi")
-            opd = st.text_input("OPD")
-            ok = st.form_submit_button("📂 Simpan")
-
-        if ok:
-            rec = {
-                "ID PEGAWAI": idp,
-                "NAMA": nama,
-                "GDP": gdp,
-                "GELAR BELAKANG": gel,
-                "JABATAN": jab,
-                "JK": jk,
-                "TEMPAT LAHIR": tmp,
-                "TL": ttl.strftime("%d/%m/%Y"),
-                "KODE OPD": kod,
-                "PENDIDIKAN AWAL": paw,
-                "PENDIDIKAN AKHIR": pak,
-                "USIA": int(usia),
-                "OPD": opd,
-                "KOMPETENSI": kmp
-            }
-            if add_row(rec):
-                st.success("Data berhasil ditambahkan ✅")
-                st.rerun()
-
-    # Hapus Data
-    elif aksi == "Hapus Data":
-        if df.empty:
-            st.info("Belum ada data!")
-        else:
-            df["label"] = df["ID PEGAWAI"].astype(str) + " - " + df["NAMA"].astype(str)
-            pilih = st.selectbox("Pilih Pegawai", df["label"])
-            id_pilih = pilih.split(" - ")[0]
-            if st.button("🔝️ Hapus"):
-                if delete_row(id_pilih):
-                    st.success("✅ Terhapus")
+    # Pilihan aksi & form hanya me-render ulang fragment ini; CRUD memicu
+    # st.rerun() penuh agar data terbaru terbaca di semua halaman
+    @st.fragment
+    def manajemen_pegawai(df: pd.DataFrame):
+        aksi = st.radio("Pilih Aksi", ["Tambah Data", "Hapus Data", "Edit Data"], horizontal=True)
+
+        # Tambah Data
+        if aksi == "Tambah Data":
+            with st.form("add", clear_on_submit=True):
+                c1, c2 = st.columns(2)
+                with c1:
+                    idp = st.text_input("ID Pegawai")
+                    nama = st.text_input("Nama")
+                    gdp = st.text_input("GDP")
+                    gel = st.text_input("Gelar Belakang")
+                    jab = st.text_input("Jabatan")
+                    jk = st.selectbox("Jenis Kelamin", ["LAKI-LAKI", "PEREMPUAN"])
+                with c2:
+                    tmp = st.text_input("Tempat Lahir")
+                    ttl = st.date_input("Tanggal Lahir", datetime.today(), min_value=datetime(1900, 1, 1))
+                    kod = st.text_input("Kode OPD")
+                    paw = st.text_input("Pendidikan Awal")
+                    pak = st.text_input("Pendidikan Akhir")
+                    usia = st.number_input("Usia", min_value=0, step=1)
+                    kmp = st.text_input("Kompetensi")
+                opd = st.text_input("OPD")
+                ok = st.form_submit_button("📂 Simpan")
+
+            if ok:
+                rec = {
+                    "ID PEGAWAI": idp,
+                    "NAMA": nama,
+                    "GDP": gdp,
+                    "GELAR BELAKANG": gel,
+                    "JABATAN": jab,
+                    "JK": jk,
+                    "TEMPAT LAHIR": tmp,
+                    "TL": ttl.strftime("%d/%m/%Y"),
+                    "KODE OPD": kod,
+                    "PENDIDIKAN AWAL": paw,
+                    "PENDIDIKAN AKHIR": pak,
+                    "USIA": int(usia),
+                    "OPD": opd,
+                    "KOMPETENSI": kmp
+                }
+                if add_row(rec):
+                    st.success("Data berhasil ditambahkan ✅")
                     st.rerun()
 
-    # Edit Data
-    elif aksi == "Edit Data":
-        if df.empty:
-            st.info("Belum ada data!")
-        else:
-            st.markdown("### ✏️ Edit Data Pegawai")
-            id_list = df["ID PEGAWAI"].unique().tolist()
-            selected_id = st.selectbox("Pilih ID Pegawai untuk Diedit", id_list)
-            ori = df[df["ID PEGAWAI"] == selected_id]
-            if not ori.empty:
-                r = ori.iloc[0]
-                with st.form("form_edit_data"):
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        idp = st.text_input("ID Pegawai", r["ID PEGAWAI"])
-                        nama = st.text_input("Nama", r["NAMA"])
-                        gdp = st.text_input("GDP", r["GDP"])
-                        gel = st.text_input("Gelar Belakang", r["GELAR BELAKANG"])
-                        jab = st.text_input("Jabatan", r["JABATAN"])
-                        jk = st.selectbox("Jenis Kelamin", ["LAKI-LAKI", "PEREMPUAN"], 0 if r["JK"].startswith("L") else 1)
-                        tmp = st.text_input("Tempat Lahir", r["TEMPAT LAHIR"])
-                    with c2:
-                        ttl_str = r["TL"]
-                        try:
-                            ttl_obj = datetime.strptime(ttl_str, "%d/%m/%Y")
-                        except:
-                            ttl_obj = datetime.today()
-                        ttl = st.date_input("Tanggal Lahir", ttl_obj, min_value=datetime(1900, 1, 1))
-                        kod = st.text_input("Kode OPD", r["KODE OPD"])
-                        paw = st.text_input("Pendidikan Awal", r["PENDIDIKAN AWAL"])
-                        pak = st.text_input("Pendidikan Akhir", r["PENDIDIKAN AKHIR"])
-                        usia = st.number_input("Usia", 0, 150, int(r["USIA"]))
-                        opd = st.text_input("OPD", r["OPD"])
-                    kmp = st.text_input("Kompetensi", r["KOMPETENSI"])
-                    simpan = st.form_submit_button("📂 Simpan")
-
-                if simpan:
-                    row = [idp, nama, gdp, gel, jab, jk, tmp, ttl.strftime("%d/%m/%Y"), kod, paw, pak, int(usia), opd, kmp]
-                    if update_row(selected_id, row):
-                        st.success("✅ Data berhasil diupdate!")
+        # Hapus Data
+        elif aksi == "Hapus Data":
+            if df.empty:
+                st.info("Belum ada data!")
+            else:
+                labels = df["ID PEGAWAI"].astype(str) + " - " + df["NAMA"].astype(str)
+                pilih = st.selectbox("Pilih Pegawai", labels)
+                id_pilih = pilih.split(" - ")[0]
+                if st.button("🔝️ Hapus"):
+                    if delete_row(id_pilih):
+                        st.success("✅ Terhapus")
                         st.rerun()
 
-        # —— Show table + download
+        # Edit Data
+        elif aksi == "Edit Data":
+            if df.empty:
+                st.info("Belum ada data!")
+            else:
+                st.markdown("### ✏️ Edit Data Pegawai")
+                id_list = df["ID PEGAWAI"].unique().tolist()
+                selected_id = st.selectbox("Pilih ID Pegawai untuk Diedit", id_list)
+                ori = df[df["ID PEGAWAI"] == selected_id]
+                if not ori.empty:
+                    r = ori.iloc[0]
+                    with st.form("form_edit_data"):
+                        c1, c2 = st.columns(2)
+                        with c1:
+                            idp = st.text_input("ID Pegawai", r["ID PEGAWAI"])
+                            nama = st.text_input("Nama", r["NAMA"])
+                            gdp = st.text_input("GDP", r["GDP"])
+                            gel = st.text_input("Gelar Belakang", r["GELAR BELAKANG"])
+                            jab = st.text_input("Jabatan", r["JABATAN"])
+                            jk = st.selectbox("Jenis Kelamin", ["LAKI-LAKI", "PEREMPUAN"], 0 if r["JK"].startswith("L") else 1)
+                            tmp = st.text_input("Tempat Lahir", r["TEMPAT LAHIR"])
+                        with c2:
+                            ttl_str = r["TL"]
+                            try:
+                                ttl_obj = datetime.strptime(ttl_str, "%d/%m/%Y")
+                            except:
+                                ttl_obj = datetime.today()
+                            ttl = st.date_input("Tanggal Lahir", ttl_obj, min_value=datetime(1900, 1, 1))
+                            kod = st.text_input("Kode OPD", r["KODE OPD"])
+                            paw = st.text_input("Pendidikan Awal", r["PENDIDIKAN AWAL"])
+                            pak = st.text_input("Pendidikan Akhir", r["PENDIDIKAN AKHIR"])
+                            usia = st.number_input("Usia", 0, 150, int(r["USIA"]))
+                            opd = st.text_input("OPD", r["OPD"])
+                        kmp = st.text_input("Kompetensi", r["KOMPETENSI"])
+                        simpan = st.form_submit_button("📂 Simpan")
+
+                    if simpan:
+                        row = [idp, nama, gdp, gel, jab, jk, tmp, ttl.strftime("%d/%m/%Y"), kod, paw, pak, int(usia), opd, kmp]
+                        if update_row(selected_id, row):
+                            st.success("✅ Data berhasil diupdate!")
+                            st.rerun()
+
+        # ✅ Tampilkan tombol link spreadsheet hanya di halaman Tambah Data
+        if aksi == "Tambah Data":
+            st.markdown("""
+            <a href="https://docs.google.com/spreadsheets/d/1z8i_J3rylC0w-kuKRu_PZ-UfbgrdF8a9w8i2s5CFjz4"
+            target="_blank">
+                <button style="background:#28a745;color:white;padding:10px 20px;
+                            border:none;border-radius:8px;font-size:16px;
+                            cursor:pointer;">
+                    📄 Buka Spreadsheet Data Pegawai
+                </button>
+            </a>
+            """, unsafe_allow_html=True)
+
+    manajemen_pegawai(df)
+
+    # —— Show table + download (di luar fragment, dirender sekali per run penuh)
     st.divider()
-    st.dataframe(get_df(),use_container_width=True)
-    st.download_button("📥 Unduh CSV", get_df().to_csv(index=False).encode(),
+    st.dataframe(df, use_container_width=True)
+    st.download_button("📥 Unduh CSV", df.to_csv(index=False).encode(),
                     "data_pegawai.csv","text/csv")
 
-    # ✅ Tampilkan tombol link spreadsheet hanya di halaman Tambah Data
-    if aksi == "Tambah Data":
-        st.markdown("""
-        <a href="https://docs.google.com/spreadsheets/d/1z8i_J3rylC0w-kuKRu_PZ-UfbgrdF8a9w8i2s5CFjz4"
-        target="_blank">
-            <button style="background:#28a745;color:white;padding:10px 20px;
-                        border:none;border-radius:8px;font-size:16px;
-                        cursor:pointer;">
-                📄 Buka Spreadsheet Data Pegawai
-            </button>
-        </a>
-        """, unsafe_allow_html=True)
-
 
 # 3️⃣  Visualisasi Clustering
 # ------------------------------------------------
@@ -533,17 +538,22 @@ elif page == "Hasil Cluster":          # ← pakai page
     })
     st.dataframe(ringkasan, use_container_width=True)
 
-    st.markdown("### 📋 Detail Pegawai per Cluster")
-    opsi = sorted(df["Kategori Cluster"].unique())
-    pilih = st.multiselect("Pilih cluster:", opsi, default=[])
-    if not pilih:
-        st.info("Silakan pilih cluster terlebih dahulu.")
-    else:
-        detail = df[df["Kategori Cluster"].isin(pilih)].sort_values(
-                    by="Sisa Masa Kerja")
-        st.dataframe(detail[[ "NAMA","JABATAN","OPD","USIA",
-                              "Sisa Masa Kerja","Level Jabatan",
-                              "Kategori Cluster"]])
+    # Multiselect hanya me-render ulang bagian detail, bukan seluruh halaman
+    @st.fragment
+    def detail_cluster(df: pd.DataFrame):
+        st.markdown("### 📋 Detail Pegawai per Cluster")
+        opsi = sorted(df["Kategori Cluster"].unique())
+        pilih = st.multiselect("Pilih cluster:", opsi, default=[])
+        if not pilih:
+            st.info("Silakan pilih cluster terlebih dahulu.")
+        else:
+            detail = df[df["Kategori Cluster"].isin(pilih)].sort_values(
+                        by="Sisa Masa Kerja")
+            st.dataframe(detail[[ "NAMA","JABATAN","OPD","USIA",
+                                  "Sisa Masa Kerja","Level Jabatan",
+                                  "Kategori Cluster"]])
+
+    detail_cluster(df)
         
         
 # ------------------ PROYEKSI PENSIUN ------------------
@@ -551,35 +561,40 @@ elif page == "Proyeksi Pensiun":
     df = apply_kmeans(get_df())
     st.subheader("📌 Proyeksi Pensiun & Ketersediaan Pengganti")
     
-    # --- Slider: Tahun Pensiun ---
-    batas_pensiun = st.slider("🎯 Batas Maksimum Sisa Masa Kerja (tahun)", min_value=1, max_value=50, value=5)
+    # Slider hanya menghitung ulang rekap di fragment ini
+    @st.fragment
+    def proyeksi_pensiun(df: pd.DataFrame):
+        # --- Slider: Tahun Pensiun ---
+        batas_pensiun = st.slider("🎯 Batas Maksimum Sisa Masa Kerja (tahun)", min_value=1, max_value=50, value=5)
+
+        # --- Filter pegawai yang akan pensiun dalam rentang tahun tsb
+        df_pensiun = df[df["Sisa Masa Kerja"] <= batas_pensiun]
+        st.markdown(f"#### 👴 Daftar Pegawai Akan Pensiun ≤ {batas_pensiun} Tahun")
+        st.dataframe(df_pensiun[['NAMA', 'JABATAN', 'OPD', 'USIA', 'Sisa Masa Kerja']])
 
-    # --- Filter pegawai yang akan pensiun dalam rentang tahun tsb
-    df_pensiun = df[df["Sisa Masa Kerja"] <= batas_pensiun]
-    st.markdown(f"#### 👴 Daftar Pegawai Akan Pensiun ≤ {batas_pensiun} Tahun")
-    st.dataframe(df_pensiun[['NAMA', 'JABATAN', 'OPD', 'USIA', 'Sisa Masa Kerja']])
+        # --- Rekap jumlah pensiun berdasarkan jabatan dan OPD
+        pensiun_grouped = df_pensiun.groupby(["JABATAN", "OPD","KOMPETENSI","PENDIDIKAN AKHIR"]).size().reset_index(name="Jumlah_Pensiun")
 
-    # --- Rekap jumlah pensiun berdasarkan jabatan dan OPD
-    pensiun_grouped = df_pensiun.groupby(["JABATAN", "OPD","KOMPETENSI","PENDIDIKAN AKHIR"]).size().reset_index(name="Jumlah_Pensiun")
+        # --- Slider: Filter Usia ASN muda
+        usia_batas = st.slider("🧒 Batas Usia ASN Muda (default < 35)", min_value=25, max_value=45, value=35)
+        df_muda = df[df["USIA"] < usia_batas]   
 
-    # --- Slider: Filter Usia ASN muda
-    usia_batas = st.slider("🧒 Batas Usia ASN Muda (default < 35)", min_value=25, max_value=45, value=35)
-    df_muda = df[df["USIA"] < usia_batas]   
+        # --- Rekap ASN muda per jabatan dan OPD
+        muda_grouped = df_muda.groupby(["JABATAN", "OPD","KOMPETENSI","PENDIDIKAN AKHIR"]).size().reset_index(name="Jumlah_Muda")
 
-    # --- Rekap ASN muda per jabatan dan OPD
-    muda_grouped = df_muda.groupby(["JABATAN", "OPD","KOMPETENSI","PENDIDIKAN AKHIR"]).size().reset_index(name="Jumlah_Muda")
+        # --- Gabungkan & analisis ketersediaan pengganti
+        df_gap = pd.merge(pensiun_grouped, muda_grouped, on=["JABATAN", "OPD","KOMPETENSI","PENDIDIKAN AKHIR"], how="left")
+        df_gap["Jumlah_Muda"] = df_gap["Jumlah_Muda"].fillna(0).astype(int)
+        df_gap["Tersedia_Pengganti"] = df_gap["Jumlah_Muda"].apply(lambda x: "Ya" if x > 0 else "Tidak")
 
-    # --- Gabungkan & analisis ketersediaan pengganti
-    df_gap = pd.merge(pensiun_grouped, muda_grouped, on=["JABATAN", "OPD","KOMPETENSI","PENDIDIKAN AKHIR"], how="left")
-    df_gap["Jumlah_Muda"] = df_gap["Jumlah_Muda"].fillna(0).astype(int)
-    df_gap["Tersedia_Pengganti"] = df_gap["Jumlah_Muda"].apply(lambda x: "Ya" if x > 0 else "Tidak")
+        st.markdown("#### 📊 Rekap Pensiun dan Pengganti")
+        st.dataframe(df_gap)
 
-    st.markdown("#### 📊 Rekap Pensiun dan Pengganti")
-    st.dataframe(df_gap)
+        # --- Tombol unduh
+        csv_gap = df_gap.to_csv(index=False).encode('utf-8')
+        st.download_button("📥 Unduh Rekap Proyeksi Pensiun", data=csv_gap, file_name="proyeksi_pensiun.csv", mime="text/csv")
 
-    # --- Tombol unduh
-    csv_gap = df_gap.to_csv(index=False).encode('utf-8')
-    st.download_button("📥 Unduh Rekap Proyeksi Pensiun", data=csv_gap, file_name="proyeksi_pensiun.csv", mime="text/csv")
+    proyeksi_pensiun(df)
 
 
 # ------------------  ------------------